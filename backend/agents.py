@@ -1,11 +1,31 @@
 import asyncio
+import functools
 import os
 import shutil
-from multiprocessing.connection import Client
+import socket
 from dataclasses import dataclass
 
 from agent_framework import AgentResponse, AgentResponseUpdate, AgentThread, ChatMessage, ChatMessageStore
 
+from . import llm_cache
+from .worker_protocol import recv_frame, recv_frame_sync, send_frame, send_frame_sync
+
+
+# PATH lookups are surprisingly slow on Windows; resolve the Copilot CLI once
+# per process instead of on every bundle build.
+_copilot_cli_path = None
+
+
+def _find_copilot_cli():
+    global _copilot_cli_path
+    if _copilot_cli_path is None:
+        _copilot_cli_path = (
+            shutil.which("copilot.cmd")
+            or shutil.which("copilot.bat")
+            or shutil.which("copilot")
+        )
+    return _copilot_cli_path
+
 
 @dataclass
 class AgentBundle:
@@ -15,12 +35,131 @@ class AgentBundle:
     publisher: object
 
 
+class _ClaudeWorkerPool:
+    """A small pool of persistent connections to the Claude worker.
+
+    Connections are plain asyncio streams speaking the framed protocol from
+    `worker_protocol`, so many outstanding requests multiplex on the event loop
+    without burning a ThreadPool slot each. Slots are opened lazily and a
+    broken connection is rebuilt transparently on the next acquire.
+    """
+
+    def __init__(self, address, authkey: bytes, size: int = 4):
+        self._address = address
+        self._authkey = authkey
+        self._slots = asyncio.Queue()
+        for _ in range(size):
+            # None marks an unopened slot; connections are made lazily.
+            self._slots.put_nowait(None)
+
+    async def _connect(self):
+        return await asyncio.open_connection(*self._address)
+
+    async def acquire(self):
+        pair = await self._slots.get()
+        if pair is None:
+            try:
+                pair = await self._connect()
+            except BaseException:
+                self._slots.put_nowait(None)
+                raise
+        return pair
+
+    def release(self, pair):
+        self._slots.put_nowait(pair)
+
+    def discard(self, pair):
+        """Drop a broken connection and free its slot for a fresh one."""
+        try:
+            pair[1].close()
+        except Exception:
+            pass
+        self._slots.put_nowait(None)
+
+    async def request(self, payload: dict) -> dict:
+        pair = await self.acquire()
+        try:
+            try:
+                reader, writer = pair
+                await send_frame(writer, payload, self._authkey)
+                response = await recv_frame(reader, self._authkey)
+            except (asyncio.IncompleteReadError, EOFError, ConnectionError):
+                # The worker hung up (e.g. it restarted); rebuild this slot
+                # and retry once. Clear `pair` first: if the re-acquire fails
+                # it restores the slot marker itself, and discarding the old
+                # pair again below would inflate the pool by one slot.
+                self.discard(pair)
+                pair = None
+                pair = await self.acquire()
+                reader, writer = pair
+                await send_frame(writer, payload, self._authkey)
+                response = await recv_frame(reader, self._authkey)
+        except BaseException:
+            if pair is not None:
+                self.discard(pair)
+            raise
+        self.release(pair)
+        return response
+
+    async def stream(self, payload: dict):
+        """Send one request and yield response chunks until the done frame.
+
+        The connection is held for the whole exchange; abandoning the
+        generator mid-stream discards it rather than returning a connection
+        with frames still in flight.
+        """
+        pair = await self.acquire()
+        try:
+            try:
+                reader, writer = pair
+                await send_frame(writer, payload, self._authkey)
+                frame = await recv_frame(reader, self._authkey)
+            except (asyncio.IncompleteReadError, EOFError, ConnectionError):
+                # Stale slot (e.g. the worker restarted); nothing has been
+                # yielded yet, so rebuild and retry once like request() does,
+                # clearing `pair` so a failed re-acquire is not discarded
+                # twice.
+                self.discard(pair)
+                pair = None
+                pair = await self.acquire()
+                reader, writer = pair
+                await send_frame(writer, payload, self._authkey)
+                frame = await recv_frame(reader, self._authkey)
+            while True:
+                if not frame.get("ok"):
+                    raise RuntimeError(frame.get("error", "Claude worker error"))
+                chunk = frame.get("chunk")
+                if chunk:
+                    yield chunk
+                if frame.get("done"):
+                    break
+                frame = await recv_frame(reader, self._authkey)
+        except BaseException:
+            if pair is not None:
+                self.discard(pair)
+            raise
+        self.release(pair)
+
+    def ping(self) -> bool:
+        """Synchronous reachability probe, used at build time before the event
+        loop is driving pooled requests."""
+        try:
+            with socket.create_connection(self._address, timeout=5) as sock:
+                send_frame_sync(sock, {"type": "ping"}, self._authkey)
+                response = recv_frame_sync(sock, self._authkey)
+            return bool(response.get("ok"))
+        except (OSError, EOFError):
+            return False
+
+
 def build_agents() -> AgentBundle:
     try:
+        import requests
         from agent_framework_github_copilot import GitHubCopilotAgent
         from azure.ai.inference import ChatCompletionsClient
         from azure.ai.inference.models import SystemMessage, UserMessage
         from azure.core.credentials import AzureKeyCredential
+        from azure.core.pipeline.transport import RequestsTransport
     except Exception as exc:
         raise RuntimeError(
             "Required agent SDKs are missing. Install dependencies and configure credentials. "
@@ -34,11 +173,7 @@ def build_agents() -> AgentBundle:
     azure_api_key = os.getenv("AZURE_OPENAI_API_KEY", "")
     azure_api_version = os.getenv("AZURE_OPENAI_API_VERSION", "").strip()
 
-    cli_path = (
-        shutil.which("copilot.cmd")
-        or shutil.which("copilot.bat")
-        or shutil.which("copilot")
-    )
+    cli_path = _find_copilot_cli()
     if not cli_path:
         raise RuntimeError("GitHub Copilot CLI not found on PATH")
 
@@ -55,17 +190,13 @@ def build_agents() -> AgentBundle:
     claude_worker_port = int(os.getenv("CLAUDE_WORKER_PORT", "8769"))
     claude_worker_key = os.getenv("CLAUDE_WORKER_KEY", "carepath").encode()
 
-    def _probe_claude_worker():
-        try:
-            conn = Client((claude_worker_host, claude_worker_port), authkey=claude_worker_key)
-            conn.send({"type": "ping"})
-            _ = conn.recv()
-            conn.close()
-            return True
-        except OSError:
-            return False
+    worker_pool = _ClaudeWorkerPool(
+        (claude_worker_host, claude_worker_port),
+        authkey=claude_worker_key,
+        size=int(os.getenv("CLAUDE_WORKER_POOL_SIZE", "4")),
+    )
 
-    if not _probe_claude_worker():
+    if not worker_pool.ping():
         raise RuntimeError(
             "Claude worker is not reachable. Start it with: python backend/claude_worker.py "
             f"(listening on {claude_worker_host}:{claude_worker_port})."
@@ -88,30 +219,65 @@ def build_agents() -> AgentBundle:
             self.instructions = instructions
             self.description = None
 
-        def _call_worker(self, prompt: str) -> str:
+        async def _call_worker(self, prompt: str) -> str:
+            cache_key = None
+            if llm_cache.enabled():
+                cache_key = llm_cache.make_key(claude_model or "claude", self.instructions, prompt)
+                hit = await llm_cache.get(cache_key)
+                if hit is not None:
+                    return hit
             payload = {
                 "instructions": self.instructions,
                 "prompt": prompt,
             }
-            conn = Client((claude_worker_host, claude_worker_port), authkey=claude_worker_key)
-            conn.send(payload)
-            response = conn.recv()
-            conn.close()
+            response = await worker_pool.request(payload)
             if not response.get("ok"):
                 raise RuntimeError(response.get("error", "Claude worker error"))
-            return response.get("text", "")
+            text = response.get("text", "")
+            if cache_key is not None:
+                await llm_cache.put(cache_key, text)
+            return text
+
+        async def prewarm(self) -> bool:
+            """Open and validate a pooled connection ahead of first use.
+
+            The build-time reachability probe uses a throwaway sync socket and
+            pool slots open lazily, so without this the first workflow pays
+            the first pooled connect.
+            """
+            try:
+                response = await worker_pool.request({"type": "ping"})
+                return bool(response.get("ok"))
+            except (OSError, EOFError):
+                return False
 
         async def run(self, messages=None, *, thread=None, **kwargs):
             prompt = _build_prompt(messages)
-            text = await asyncio.to_thread(self._call_worker, prompt)
+            text = await self._call_worker(prompt)
             msg = ChatMessage(role="assistant", text=text, author_name=self.name)
             return AgentResponse(messages=[msg])
 
         def run_stream(self, messages=None, *, thread=None, **kwargs):
             async def _stream():
-                response = await self.run(messages, thread=thread, **kwargs)
-                update = AgentResponseUpdate(text=response.text, role="assistant", author_name=self.name)
-                yield update
+                prompt = _build_prompt(messages)
+                cache_key = None
+                if llm_cache.enabled():
+                    cache_key = llm_cache.make_key(claude_model or "claude", self.instructions, prompt)
+                    hit = await llm_cache.get(cache_key)
+                    if hit is not None:
+                        yield AgentResponseUpdate(text=hit, role="assistant", author_name=self.name)
+                        return
+                payload = {
+                    "instructions": self.instructions,
+                    "prompt": prompt,
+                    "stream": True,
+                }
+                parts = []
+                async for chunk in worker_pool.stream(payload):
+                    parts.append(chunk)
+                    yield AgentResponseUpdate(text=chunk, role="assistant", author_name=self.name)
+                if cache_key is not None and parts:
+                    await llm_cache.put(cache_key, "".join(parts))
 
             return _stream()
 
@@ -124,13 +290,28 @@ def build_agents() -> AgentBundle:
     )
 
     class AzureReviewerAgent:
+        SYSTEM_INSTRUCTIONS = (
+            "You are a marketing compliance and quality reviewer. "
+            "Respond with JSON only: {\"approved\": true/false, \"feedback\": \"...\", \"risk_notes\": \"...\"}."
+        )
+
         def __init__(self, endpoint: str, api_key: str, model: str):
             client_kwargs = {}
             if azure_api_version:
                 client_kwargs["api_version"] = azure_api_version
+            # Explicit keep-alive transport: a session with a sized adapter
+            # keeps TCP+TLS connections to Azure open across reviewer calls,
+            # so parallel loop variants share warm connections instead of
+            # re-handshaking. azure-core is thread-safe, which covers the
+            # asyncio.to_thread call path.
+            session = requests.Session()
+            adapter = requests.adapters.HTTPAdapter(pool_connections=16, pool_maxsize=16)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
             self.client = ChatCompletionsClient(
                 endpoint=endpoint,
                 credential=AzureKeyCredential(api_key),
+                transport=RequestsTransport(session=session, connection_timeout=5),
                 **client_kwargs,
             )
             self.model = model
@@ -149,22 +330,38 @@ def build_agents() -> AgentBundle:
                 except Exception:
                     prompt = str(messages)
 
-            response = await asyncio.to_thread(
-                self.client.complete,
-                model=self.model,
-                messages=[
-                    SystemMessage(
-                        content=(
-                            "You are a marketing compliance and quality reviewer. "
-                            "Respond with JSON only: {\"approved\": true/false, \"feedback\": \"...\", \"risk_notes\": \"...\"}."
-                        )
-                    ),
-                    UserMessage(content=prompt),
-                ],
+            cache_key = None
+            if llm_cache.enabled():
+                cache_key = llm_cache.make_key(self.model, self.SYSTEM_INSTRUCTIONS, prompt)
+                hit = await llm_cache.get(cache_key)
+                if hit is not None:
+                    msg = ChatMessage(role="assistant", text=hit, author_name=self.name)
+                    return AgentResponse(messages=[msg])
+
+            complete_future = asyncio.get_running_loop().run_in_executor(
+                None,
+                functools.partial(
+                    self.client.complete,
+                    model=self.model,
+                    messages=[
+                        SystemMessage(content=self.SYSTEM_INSTRUCTIONS),
+                        UserMessage(content=prompt),
+                    ],
+                ),
             )
+            try:
+                response = await asyncio.shield(complete_future)
+            except asyncio.CancelledError:
+                # The sync HTTP call cannot be interrupted mid-flight; detach
+                # it (swallowing any late error) so cancellation returns
+                # immediately instead of waiting out the full Azure round-trip.
+                complete_future.add_done_callback(lambda fut: fut.exception())
+                raise
             text = "No response from Azure reviewer."
             if response and response.choices:
                 text = response.choices[0].message.content
+                if cache_key is not None:
+                    await llm_cache.put(cache_key, text)
             msg = ChatMessage(role="assistant", text=text, author_name=self.name)
             return AgentResponse(messages=[msg])
 
@@ -1,9 +1,13 @@
 import asyncio
-import json
+import itertools
 import os
 import sys
+import time
+from datetime import datetime
 from pathlib import Path
 
+import orjson
+
 from dotenv import load_dotenv
 from fastapi import FastAPI, WebSocket, WebSocketDisconnect
 from fastapi.responses import FileResponse
@@ -11,7 +15,7 @@ from fastapi.staticfiles import StaticFiles
 
 try:
     from backend.agents import build_agents
-    from backend.database import init_db, list_published_packages, save_published_package
+    from backend.database import close_db, init_db, list_published_packages, save_published_package
     from backend.models import CampaignRequest
     from backend.workflow import WorkflowControls, run_campaign_workflow
 except ModuleNotFoundError:
@@ -20,7 +24,7 @@ except ModuleNotFoundError:
     if str(ROOT) not in sys.path:
         sys.path.insert(0, str(ROOT))
     from backend.agents import build_agents
-    from backend.database import init_db, list_published_packages, save_published_package
+    from backend.database import close_db, init_db, list_published_packages, save_published_package
     from backend.models import CampaignRequest
     from backend.workflow import WorkflowControls, run_campaign_workflow
 
@@ -33,10 +37,70 @@ load_dotenv(Path(__file__).resolve().parent / ".env")
 ROOT = Path(__file__).resolve().parents[1]
 UI_DIR = ROOT / "ui"
 
+
+def _encode_event(event_type: str, payload: dict) -> bytes:
+    # orjson serializes straight to UTF-8 bytes, so events go out via
+    # send_bytes without the json.dumps str + re-encode step.
+    return orjson.dumps({"type": event_type, "payload": payload})
+
+
+# Monotonic suffix keeps package ids unique even when concurrent workflows
+# publish within the same nanosecond timestamp.
+_package_counter = itertools.count()
+
+
+# The connect greeting never changes; encode it once.
+_CONNECTED_EVENT = _encode_event(
+    "system",
+    {"message": "Connected to marketing multi-agent workflow."},
+)
+
 app = FastAPI(title="Marketing Campaign Multi-Agent")
 app.mount("/ui", StaticFiles(directory=UI_DIR), name="ui")
 
-init_db()
+async def _warm_agents(agents):
+    # The planner's first call pays Copilot CLI boot, the reviewer's first
+    # call pays the Azure TLS handshake, and the Claude worker pool opens its
+    # connections lazily. Warm all three in parallel so the first real
+    # workflow starts against hot clients.
+    async def _warm(label, coro):
+        try:
+            await coro
+        except Exception as exc:
+            print(f"[startup] {label} warm-up skipped: {exc}")
+
+    await asyncio.gather(
+        _warm("planner", agents.planner.run(messages="Reply with the single word: ready.")),
+        _warm("reviewer", agents.reviewer.run(messages="Reply with the single word: ready.")),
+        _warm("claude worker", agents.writer.prewarm()),
+    )
+    app.state.warm = True
+
+
+@app.on_event("startup")
+async def build_shared_agents():
+    # The schema setup runs here (not at import) so the aiosqlite connection
+    # is created on the loop that will serve requests.
+    await init_db()
+    # Build one bundle for the process so per-connection setup cost (CLI
+    # lookup, worker ping, Azure TLS handshake) is paid once at startup
+    # instead of on every WebSocket connect. Agents are stateless between
+    # runs, so sharing them across sessions is safe.
+    try:
+        app.state.agents = build_agents()
+    except Exception as exc:
+        # Leave the bundle unset; the first connect retries and reports.
+        print(f"[startup] Agent bundle not ready yet: {exc}")
+        app.state.agents = None
+        return
+    # Warm in the background so startup does not block on LLM round-trips.
+    app.state.warm = False
+    app.state.warm_task = asyncio.create_task(_warm_agents(app.state.agents))
+
+
+@app.on_event("shutdown")
+async def close_database():
+    await close_db()
 
 
 @app.get("/")
@@ -53,17 +117,18 @@ async def health():
 async def websocket_endpoint(websocket: WebSocket):
     await websocket.accept()
     try:
-        agents = build_agents()
+        agents = getattr(app.state, "agents", None)
+        if agents is None:
+            agents = build_agents()
+            app.state.agents = agents
     except Exception as exc:
-        await websocket.send_text(
-            json.dumps(
+        await websocket.send_bytes(
+            _encode_event(
+                "error",
                 {
-                    "type": "error",
-                    "payload": {
-                        "message": "Agent initialization failed. Check SDK installs and credentials.",
-                        "details": str(exc),
-                    },
-                }
+                    "message": "Agent initialization failed. Check SDK installs and credentials.",
+                    "details": str(exc),
+                },
             )
         )
         await websocket.close(code=1011)
@@ -75,15 +140,8 @@ async def websocket_endpoint(websocket: WebSocket):
         f"api_version={os.getenv('AZURE_OPENAI_API_VERSION') or '2024-05-01-preview'}"
     )
     print(azure_config_message)
-    await websocket.send_text(
-        json.dumps(
-            {
-                "type": "system",
-                "payload": {
-                    "message": azure_config_message
-                },
-            }
-        )
+    await websocket.send_bytes(
+        _encode_event("system", {"message": azure_config_message})
     )
     controls = WorkflowControls(
         feedback_queue=asyncio.Queue(),
@@ -94,38 +152,32 @@ async def websocket_endpoint(websocket: WebSocket):
 
     async def send_event(event_type: str, payload: dict):
         if event_type == "final_output":
-            from datetime import datetime
-            package_id = datetime.utcnow().strftime("%Y%m%d%H%M%S%f")
-            name = f"Campaign {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}"
-            created_at = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            package_id = f"{time.time_ns():x}{next(_package_counter):x}"
+            created_at = datetime.now().isoformat(sep=" ", timespec="seconds")
+            name = f"Campaign {created_at}"
             publish_package = payload.get("publish_package", "")
-            save_published_package(package_id, name, created_at, publish_package)
+            await save_published_package(package_id, name, created_at, publish_package)
             payload = {
                 **payload,
                 "id": package_id,
                 "name": name,
                 "time": created_at,
             }
-        await websocket.send_text(json.dumps({"type": event_type, "payload": payload}))
+        await websocket.send_bytes(_encode_event(event_type, payload))
 
-    await send_event(
-        "system",
-        {
-            "message": "Connected to marketing multi-agent workflow.",
-        },
-    )
+    await websocket.send_bytes(_CONNECTED_EVENT)
 
     await send_event(
         "published_history",
         {
-            "items": list_published_packages(),
+            "items": await list_published_packages(),
         },
     )
 
     try:
         while True:
             raw = await websocket.receive_text()
-            data = json.loads(raw)
+            data = orjson.loads(raw)
             event_type = data.get("type")
             payload = data.get("payload", {})
 
@@ -143,6 +195,13 @@ async def websocket_endpoint(websocket: WebSocket):
             elif event_type == "cancel_workflow":
                 if workflow_task and not workflow_task.done():
                     workflow_task.cancel()
+                    # Wait for the workflow to unwind so pooled worker
+                    # connections are torn down (which aborts the in-flight
+                    # Claude call on the worker side) before reporting.
+                    try:
+                        await workflow_task
+                    except (asyncio.CancelledError, Exception):
+                        pass
                     await send_event("status", {"phase": "system", "message": "Workflow cancelled."})
             else:
                 await send_event("error", {"message": f"Unknown event: {event_type}"})
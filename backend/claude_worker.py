@@ -4,22 +4,37 @@ import shutil
 import sys
 import tempfile
 import traceback
-from multiprocessing.connection import Listener
 
 from agent_framework_claude import ClaudeAgent
 
+try:
+    from backend.worker_protocol import recv_frame, send_frame
+except ModuleNotFoundError:
+    # Allow running via `python backend/claude_worker.py`.
+    from worker_protocol import recv_frame, send_frame
+
 
 def _claude_stderr(line: str):
     print(f"[Claude stderr] {line}")
 
 
+_claude_cli_path = None
+
+
+def _find_claude_cli():
+    global _claude_cli_path
+    if _claude_cli_path is None:
+        _claude_cli_path = os.getenv("CLAUDE_AGENT_CLI_PATH") or (
+            shutil.which("claude.exe")
+            or shutil.which("claude.cmd")
+            or shutil.which("claude")
+        )
+    return _claude_cli_path
+
+
 def build_claude_options():
     claude_model = os.getenv("CLAUDE_AGENT_MODEL")
-    claude_cli_path = os.getenv("CLAUDE_AGENT_CLI_PATH") or (
-        shutil.which("claude.exe")
-        or shutil.which("claude.cmd")
-        or shutil.which("claude")
-    )
+    claude_cli_path = _find_claude_cli()
     if not claude_cli_path:
         raise RuntimeError("Claude Code CLI not found on PATH. Install it or set CLAUDE_AGENT_CLI_PATH.")
 
@@ -44,59 +59,124 @@ async def run_request(instructions: str, prompt: str) -> str:
     return result.text if hasattr(result, "text") else str(result)
 
 
-def run_request_sync(instructions: str, prompt: str) -> str:
-    loop = asyncio.new_event_loop()
-    asyncio.set_event_loop(loop)
-    print(f"[ClaudeWorker] event loop: {type(loop).__name__}")
+async def run_request_stream(instructions: str, prompt: str):
+    options = build_claude_options()
+    async with ClaudeAgent(
+        instructions=instructions,
+        default_options=options,
+    ) as agent:
+        async for update in agent.run_stream(prompt):
+            text = getattr(update, "text", None)
+            if text:
+                yield text
+
+
+async def run_with_disconnect_watch(reader, coro):
+    """Run an SDK call, aborting it if the peer hangs up while it is in flight.
+
+    The backend closes a pooled connection when its workflow task is
+    cancelled; watching the reader for EOF lets us cancel the Claude call at
+    that moment instead of letting it run to completion for a dead client.
+    The client sends nothing mid-request, so the single watched byte is only
+    ever an EOF (or a protocol violation, treated the same way).
+    """
+    work = asyncio.ensure_future(coro)
+    watch = asyncio.create_task(reader.read(1))
+    await asyncio.wait({work, watch}, return_when=asyncio.FIRST_COMPLETED)
+    if work.done():
+        watch.cancel()
+        # Wait for the cancelled read to release the stream's waiter, or the
+        # next recv_frame on this connection raises "readexactly() called
+        # while another coroutine is already waiting for incoming data".
+        try:
+            await watch
+        except asyncio.CancelledError:
+            pass
+        return await work
+    work.cancel()
+    try:
+        await work
+    except asyncio.CancelledError:
+        pass
+    print("[ClaudeWorker] client disconnected; request cancelled")
+    raise ConnectionResetError("Client disconnected during request.")
+
+
+async def stream_to_client(writer, instructions: str, prompt: str, authkey: bytes):
+    async for chunk in run_request_stream(instructions, prompt):
+        await send_frame(writer, {"ok": True, "chunk": chunk}, authkey)
+    await send_frame(writer, {"ok": True, "done": True}, authkey)
+
+
+async def serve_connection(reader, writer, authkey: bytes, shutdown_event: asyncio.Event):
+    # Connections are persistent: the backend keeps a small pool of them open
+    # and sends framed requests until it hangs up.
     try:
-        return loop.run_until_complete(run_request(instructions, prompt))
+        while not shutdown_event.is_set():
+            try:
+                payload = await recv_frame(reader, authkey)
+            except (asyncio.IncompleteReadError, ConnectionResetError, ConnectionError):
+                break
+            try:
+                if payload.get("type") == "shutdown":
+                    await send_frame(writer, {"ok": True}, authkey)
+                    shutdown_event.set()
+                    break
+                if payload.get("type") == "ping":
+                    await send_frame(writer, {"ok": True}, authkey)
+                    continue
+                print("[ClaudeWorker] request received")
+                instructions = payload.get("instructions", "")
+                prompt = payload.get("prompt", "")
+                # Requests run directly on the long-lived server loop: the SDK
+                # call is async all the way down, so concurrent connections
+                # interleave without per-request loop setup or threads.
+                if payload.get("stream"):
+                    # Streaming aborts naturally: the first send_frame after a
+                    # hang-up raises and closes the chunk generator.
+                    await stream_to_client(writer, instructions, prompt, authkey)
+                else:
+                    result = await run_with_disconnect_watch(
+                        reader, run_request(instructions, prompt)
+                    )
+                    await send_frame(writer, {"ok": True, "text": result}, authkey)
+            except ConnectionError:
+                break
+            except Exception as exc:
+                print("[ClaudeWorker] error:", exc)
+                traceback.print_exc()
+                try:
+                    await send_frame(writer, {"ok": False, "error": str(exc)}, authkey)
+                except Exception:
+                    break
     finally:
-        loop.close()
-        asyncio.set_event_loop(None)
+        try:
+            writer.close()
+        except Exception:
+            pass
+
+
+async def serve():
+    host = "127.0.0.1"
+    port = int(os.getenv("CLAUDE_WORKER_PORT", "8769"))
+    authkey = os.getenv("CLAUDE_WORKER_KEY", "carepath").encode()
+    shutdown_event = asyncio.Event()
+
+    server = await asyncio.start_server(
+        lambda reader, writer: serve_connection(reader, writer, authkey, shutdown_event),
+        host,
+        port,
+    )
+    print(f"[ClaudeWorker] listening on {host}:{port}")
+    async with server:
+        await shutdown_event.wait()
 
 
 def main():
     # NOTE: Do NOT set WindowsSelectorEventLoopPolicy here.
     # The default ProactorEventLoop is required for subprocess support on Windows,
     # which the Claude SDK needs to spawn claude.exe.
-
-    address = ("127.0.0.1", int(os.getenv("CLAUDE_WORKER_PORT", "8769")))
-    authkey = os.getenv("CLAUDE_WORKER_KEY", "carepath").encode()
-    listener = Listener(address, authkey=authkey)
-    print(f"[ClaudeWorker] listening on {address[0]}:{address[1]}")
-
-    while True:
-        try:
-            conn = listener.accept()
-        except ConnectionAbortedError:
-            continue
-        try:
-            payload = conn.recv()
-            if payload.get("type") == "shutdown":
-                conn.send({"ok": True})
-                conn.close()
-                break
-            if payload.get("type") == "ping":
-                conn.send({"ok": True})
-                conn.close()
-                continue
-            print("[ClaudeWorker] request received")
-            instructions = payload.get("instructions", "")
-            prompt = payload.get("prompt", "")
-            result = run_request_sync(instructions, prompt)
-            conn.send({"ok": True, "text": result})
-        except Exception as exc:
-            print("[ClaudeWorker] error:", exc)
-            traceback.print_exc()
-            try:
-                conn.send({"ok": False, "error": str(exc)})
-            except Exception:
-                pass
-        finally:
-            try:
-                conn.close()
-            except Exception:
-                pass
+    asyncio.run(serve())
 
 
 if __name__ == "__main__":
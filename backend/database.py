@@ -1,15 +1,60 @@
-import sqlite3
+import asyncio
 from pathlib import Path
-from typing import List, Dict
+from typing import List, Dict, Optional
+
+import aiosqlite
 
 
 DB_PATH = Path(__file__).resolve().parent / "campaign_flow.db"
 
+# One aiosqlite connection for the process lifetime instead of a connect/close
+# cycle per call. aiosqlite runs the sqlite3 work on its own thread, so these
+# awaits never stall the event loop the way the old synchronous calls did. WAL
+# with synchronous=NORMAL keeps writes durable enough for a demo DB while
+# dropping the per-write fsync cost; autocommit mode (isolation_level=None)
+# means no explicit commit calls. The lock serializes access to the shared
+# connection.
+_conn: Optional[aiosqlite.Connection] = None
+_conn_lock = asyncio.Lock()
+
+_INSERT_PACKAGE_SQL = """
+    INSERT INTO published_packages (id, name, created_at, publish_package)
+    VALUES (?, ?, ?, ?)
+"""
+
+_LIST_PACKAGES_SQL = """
+    SELECT id, name, created_at, publish_package
+    FROM published_packages
+    ORDER BY created_at DESC
+    LIMIT ?
+"""
+
+
+async def _get_conn() -> aiosqlite.Connection:
+    global _conn
+    if _conn is None:
+        conn = await aiosqlite.connect(DB_PATH, isolation_level=None)
+        await conn.execute("PRAGMA journal_mode=WAL")
+        await conn.execute("PRAGMA synchronous=NORMAL")
+        await conn.execute("PRAGMA temp_store=MEMORY")
+        _conn = conn
+    return _conn
+
 
-def init_db():
-    conn = sqlite3.connect(DB_PATH)
-    try:
-        conn.execute(
+async def close_db():
+    """Close the shared connection; aiosqlite's worker thread is non-daemon,
+    so leaving it open keeps the interpreter from shutting down."""
+    global _conn
+    async with _conn_lock:
+        if _conn is not None:
+            await _conn.close()
+            _conn = None
+
+
+async def init_db():
+    async with _conn_lock:
+        conn = await _get_conn()
+        await conn.execute(
             """
             CREATE TABLE IF NOT EXISTS published_packages (
                 id TEXT PRIMARY KEY,
@@ -19,47 +64,65 @@ def init_db():
             )
             """
         )
-        conn.commit()
-    finally:
-        conn.close()
+        await conn.execute(
+            """
+            CREATE INDEX IF NOT EXISTS idx_pub_created
+            ON published_packages(created_at DESC)
+            """
+        )
+        await conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS llm_cache (
+                key TEXT PRIMARY KEY,
+                text TEXT NOT NULL,
+                created_at TEXT NOT NULL
+            )
+            """
+        )
 
 
-def save_published_package(package_id: str, name: str, created_at: str, publish_package: str):
-    conn = sqlite3.connect(DB_PATH)
-    try:
-        conn.execute(
-            """
-            INSERT INTO published_packages (id, name, created_at, publish_package)
-            VALUES (?, ?, ?, ?)
-            """,
+async def save_published_package(package_id: str, name: str, created_at: str, publish_package: str):
+    async with _conn_lock:
+        conn = await _get_conn()
+        await conn.execute(
+            _INSERT_PACKAGE_SQL,
             (package_id, name, created_at, publish_package),
         )
-        conn.commit()
-    finally:
-        conn.close()
 
 
-def list_published_packages(limit: int = 20) -> List[Dict]:
-    conn = sqlite3.connect(DB_PATH)
-    try:
-        cursor = conn.execute(
+async def list_published_packages(limit: int = 20) -> List[Dict]:
+    async with _conn_lock:
+        conn = await _get_conn()
+        cursor = await conn.execute(_LIST_PACKAGES_SQL, (limit,))
+        rows = await cursor.fetchall()
+        await cursor.close()
+    return [
+        {
+            "id": row[0],
+            "name": row[1],
+            "time": row[2],
+            "publish_package": row[3],
+        }
+        for row in rows
+    ]
+
+
+async def get_cached_response(key: str) -> Optional[str]:
+    async with _conn_lock:
+        conn = await _get_conn()
+        cursor = await conn.execute("SELECT text FROM llm_cache WHERE key = ?", (key,))
+        row = await cursor.fetchone()
+        await cursor.close()
+    return row[0] if row else None
+
+
+async def put_cached_response(key: str, text: str, created_at: str):
+    async with _conn_lock:
+        conn = await _get_conn()
+        await conn.execute(
             """
-            SELECT id, name, created_at, publish_package
-            FROM published_packages
-            ORDER BY created_at DESC
-            LIMIT ?
+            INSERT OR REPLACE INTO llm_cache (key, text, created_at)
+            VALUES (?, ?, ?)
             """,
-            (limit,),
+            (key, text, created_at),
         )
-        rows = cursor.fetchall()
-        return [
-            {
-                "id": row[0],
-                "name": row[1],
-                "time": row[2],
-                "publish_package": row[3],
-            }
-            for row in rows
-        ]
-    finally:
-        conn.close()
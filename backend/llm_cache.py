@@ -0,0 +1,47 @@
+import hashlib
+import os
+from collections import OrderedDict
+from datetime import datetime
+from typing import Optional
+
+from .database import get_cached_response, put_cached_response
+
+# Process-local cache for deterministic LLM responses, keyed by a hash of
+# (model, instructions, prompt). Hits are served from a small in-memory LRU
+# first; misses fall back to the SQLite table so the cache survives restarts.
+# The LRU is only touched from the event loop, so no locking is needed.
+
+_MEMORY_LIMIT = 256
+
+_memory: "OrderedDict[str, str]" = OrderedDict()
+
+
+def enabled() -> bool:
+    return os.getenv("LLM_CACHE_ENABLED", "").lower() in ("1", "true", "yes")
+
+
+def make_key(model: str, instructions: str, prompt: str) -> str:
+    return hashlib.sha256(f"{model}\0{instructions}\0{prompt}".encode()).hexdigest()
+
+
+def _remember(key: str, text: str):
+    _memory[key] = text
+    _memory.move_to_end(key)
+    while len(_memory) > _MEMORY_LIMIT:
+        _memory.popitem(last=False)
+
+
+async def get(key: str) -> Optional[str]:
+    if key in _memory:
+        _memory.move_to_end(key)
+        return _memory[key]
+    text = await get_cached_response(key)
+    if text is None:
+        return None
+    _remember(key, text)
+    return text
+
+
+async def put(key: str, text: str):
+    _remember(key, text)
+    await put_cached_response(key, text, datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
@@ -0,0 +1,65 @@
+import hashlib
+import hmac
+import pickle
+import socket
+import struct
+
+# Framed message protocol shared by the backend and the Claude worker.
+#
+# Each message is a pickled payload prefixed with a 4-byte big-endian length;
+# the body carries an HMAC-SHA256 tag derived from the worker key. This keeps
+# the authkey semantics of multiprocessing.connection without its
+# per-connection challenge/response handshake, and works over plain asyncio
+# streams so the backend can multiplex requests without threads.
+
+_HEADER = struct.Struct(">I")
+_DIGEST_SIZE = hashlib.sha256().digest_size
+
+
+def _tag(authkey: bytes, body: bytes) -> bytes:
+    return hmac.new(authkey, body, hashlib.sha256).digest()
+
+
+def encode_frame(payload, authkey: bytes) -> bytes:
+    body = pickle.dumps(payload)
+    tagged = _tag(authkey, body) + body
+    return _HEADER.pack(len(tagged)) + tagged
+
+
+def _decode_body(tagged: bytes, authkey: bytes):
+    tag, body = tagged[:_DIGEST_SIZE], tagged[_DIGEST_SIZE:]
+    if not hmac.compare_digest(tag, _tag(authkey, body)):
+        raise ConnectionError("Worker frame failed HMAC authentication.")
+    return pickle.loads(body)
+
+
+async def send_frame(writer, payload, authkey: bytes):
+    writer.write(encode_frame(payload, authkey))
+    await writer.drain()
+
+
+async def recv_frame(reader, authkey: bytes):
+    header = await reader.readexactly(_HEADER.size)
+    (length,) = _HEADER.unpack(header)
+    tagged = await reader.readexactly(length)
+    return _decode_body(tagged, authkey)
+
+
+def _recv_exact(sock: socket.socket, count: int) -> bytes:
+    chunks = b""
+    while len(chunks) < count:
+        chunk = sock.recv(count - len(chunks))
+        if not chunk:
+            raise EOFError("Worker connection closed.")
+        chunks += chunk
+    return chunks
+
+
+def send_frame_sync(sock: socket.socket, payload, authkey: bytes):
+    sock.sendall(encode_frame(payload, authkey))
+
+
+def recv_frame_sync(sock: socket.socket, authkey: bytes):
+    header = _recv_exact(sock, _HEADER.size)
+    (length,) = _HEADER.unpack(header)
+    return _decode_body(_recv_exact(sock, length), authkey)
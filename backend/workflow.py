@@ -1,12 +1,22 @@
 import asyncio
 import json
 import os
+import re
 from dataclasses import dataclass
+from string import Template
 from typing import Callable, Dict, Optional
 
+import fastjsonschema
 from agent_framework import SequentialBuilder
 from agent_framework import WorkflowOutputEvent, WorkflowStatusEvent, WorkflowFailedEvent, WorkflowStartedEvent
 
+try:
+    from agent_framework import AgentRunUpdateEvent
+except ImportError:
+    # Framework builds without streaming update events; chunks are then only
+    # visible once the full response lands.
+    AgentRunUpdateEvent = None
+
 from .models import CampaignRequest
 
 
@@ -17,28 +27,158 @@ class WorkflowControls:
     publish_queue: asyncio.Queue
 
 
+# Static instruction blocks come first and dynamic content (draft, feedback)
+# is appended at the tail, so provider-side prompt caching can reuse the
+# multi-KB prefix across writer/reviewer loops.
+REVIEWER_PREFIX = (
+    "Review the draft for clarity, compliance, and brand safety. "
+    "Respond with JSON only: {\"approved\": true/false, \"feedback\": \"...\", \"risk_notes\": \"...\"}.\n\n"
+)
+
+# Appended to the writer prompt in fused mode so one round-trip returns both
+# the draft and a self-review verdict.
+FUSED_REVIEW_SUFFIX = (
+    "\nAfter writing, review your own draft for clarity, compliance, and brand "
+    "safety. Respond with JSON only: {\"draft\": \"...\", \"self_review\": "
+    "{\"approved\": true/false, \"feedback\": \"...\", \"risk_notes\": \"...\"}}.\n"
+)
+
+# Prompt builders precompiled at import; per call only .substitute() runs, and
+# the fixed template text doubles as the stable prefix the prompt-cache
+# restructuring relies on.
+_CONTEXT_TMPL = Template(
+    "Brief: $brief\n"
+    "Goal: $goal\n"
+    "Audience: $audience\n"
+    "Channels: $channels\n"
+    "Tone: $tone\n"
+    "Constraints: $constraints\n"
+)
+_PLAN_TMPL = Template(
+    "Create a marketing campaign plan with: objectives, key message, channel mix, "
+    "timeline, and KPIs. Use this context:\n$context"
+)
+_SKELETON_TMPL = Template(
+    "Write an initial campaign draft skeleton directly from this brief. Provide: "
+    "headline, key message, channel-specific copy, CTA, and disclaimers if needed.\n$context"
+)
+_WRITER_PREFIX_TMPL = Template(
+    "Write a campaign draft based on this plan and feedback. Provide: "
+    "headline, key message, channel-specific copy, CTA, and disclaimers if needed.\n"
+    "Plan:\n$plan\n\n"
+    "Brand constraints:\n$constraints\n\n"
+)
+_SKELETON_TAIL_TMPL = Template("Initial draft to refine against the plan:\n$skeleton\n")
+_FEEDBACK_TAIL_TMPL = Template("Reviewer feedback to address:\n$feedback\n")
+_VARIANT_TAIL_TMPL = Template(
+    "Variant $variant guidance: take a bolder, more direct angle on the same plan.\n"
+)
+_HUMAN_TAIL_TMPL = Template("Human feedback to incorporate:\n$feedback\n")
+_PREVIOUS_FEEDBACK_TAIL_TMPL = Template("Previous reviewer feedback:\n$feedback\n")
+_REVIEWER_TMPL = Template(f"{REVIEWER_PREFIX}Draft:\n$draft")
+_PUBLISH_TMPL = Template(
+    "Finalize the approved campaign into a publish-ready package: final copy, "
+    "scheduling notes, and asset checklist.\n\n"
+    "Approved Draft:\n$draft"
+)
+
+
+# Greedy match from the first { to the last }, so fenced or prose-wrapped
+# JSON is extracted in a single scan instead of separate find/rfind passes.
+_JSON_RE = re.compile(r"\{.*\}", re.DOTALL)
+
+
 def _safe_json_parse(text: str) -> Optional[Dict]:
     try:
         return json.loads(text)
     except json.JSONDecodeError:
-        start = text.find("{")
-        end = text.rfind("}")
-        if start >= 0 and end > start:
+        match = _JSON_RE.search(text)
+        if match:
             try:
-                return json.loads(text[start : end + 1])
+                return json.loads(match.group(0))
             except json.JSONDecodeError:
                 return None
     return None
 
 
-def _extract_latest(conversation, author_name: str) -> str:
-    for msg in reversed(conversation):
-        if getattr(msg, "author_name", None) == author_name and getattr(msg, "text", None):
-            return msg.text
-    for msg in reversed(conversation):
-        if getattr(msg, "text", None):
-            return msg.text
-    return ""
+# Compiled once at import; fastjsonschema generates a plain-Python validator,
+# so per-response validation is sub-microsecond.
+_REVIEW_VALIDATOR = fastjsonschema.compile(
+    {
+        "type": "object",
+        "required": ["approved", "feedback"],
+        "properties": {
+            "approved": {"type": "boolean"},
+            "feedback": {"type": "string"},
+            "risk_notes": {"type": "string"},
+        },
+    }
+)
+
+
+_FUSED_VALIDATOR = fastjsonschema.compile(
+    {
+        "type": "object",
+        "required": ["draft", "self_review"],
+        "properties": {
+            "draft": {"type": "string"},
+            "self_review": {
+                "type": "object",
+                "required": ["approved", "feedback"],
+                "properties": {
+                    "approved": {"type": "boolean"},
+                    "feedback": {"type": "string"},
+                    "risk_notes": {"type": "string"},
+                },
+            },
+        },
+    }
+)
+
+
+def _parse_review(text: str) -> Optional[Dict]:
+    """Parse a reviewer response, rejecting JSON that does not match the
+    verdict schema (e.g. `approved` returned as the string \"true\") so
+    malformed approvals fall back to the heuristic path."""
+    parsed = _safe_json_parse(text)
+    if parsed is None:
+        return None
+    try:
+        _REVIEW_VALIDATOR(parsed)
+    except fastjsonschema.JsonSchemaException:
+        return None
+    return parsed
+
+
+def _parse_fused_review(text: str) -> Optional[Dict]:
+    parsed = _safe_json_parse(text)
+    if parsed is None:
+        return None
+    try:
+        _FUSED_VALIDATOR(parsed)
+    except fastjsonschema.JsonSchemaException:
+        return None
+    return parsed
+
+
+def _index_last_by_author(conversation) -> Dict[Optional[str], str]:
+    """Record the last non-empty text per author in one forward pass.
+
+    The None key holds the last text from any author, replacing the old
+    fallback reverse scan with an O(1) lookup.
+    """
+    last_by_author: Dict[Optional[str], str] = {}
+    for msg in conversation:
+        text = getattr(msg, "text", None)
+        if not text:
+            continue
+        last_by_author[getattr(msg, "author_name", None)] = text
+        last_by_author[None] = text
+    return last_by_author
+
+
+def _latest(last_by_author: Dict[Optional[str], str], author_name: str) -> str:
+    return last_by_author.get(author_name) or last_by_author.get(None, "")
 
 
 async def run_campaign_workflow(
@@ -52,6 +192,8 @@ async def run_campaign_workflow(
             "status",
             {"phase": phase, "message": f"{label} started. Awaiting response..."},
         )
+        # Workflow instances preserve state across runs and reject concurrent
+        # executions, so each phase (and each racing variant) needs its own.
         workflow = SequentialBuilder().participants(participants).build()
         outputs = []
         async for event in workflow.run_stream(prompt):
@@ -61,69 +203,159 @@ async def run_campaign_workflow(
                 await send_event("workflow_event", {"phase": phase, "event": f"status:{event.state}"})
             elif isinstance(event, WorkflowFailedEvent):
                 await send_event("workflow_event", {"phase": phase, "event": "failed", "details": str(event.details)})
+            elif AgentRunUpdateEvent is not None and isinstance(event, AgentRunUpdateEvent):
+                # Forward partial tokens as they stream so the UI sees text
+                # before the full response lands.
+                delta = getattr(event.data, "text", None)
+                if delta:
+                    await send_event("agent_stream", {"phase": phase, "delta": delta})
             elif isinstance(event, WorkflowOutputEvent):
                 outputs.append(event.data)
         conversation = outputs[-1] if outputs else []
         await send_event("status", {"phase": phase, "message": f"{label} completed."})
-        return conversation
+        return _index_last_by_author(conversation)
 
-    async def run_writer_reviewer(prompt: str, loop_index: int):
-        writer_conversation = await run_sequential(
-            [agents.writer],
-            prompt,
-            "writer",
-            f"Writer (loop {loop_index})",
-        )
-        writer_text = _extract_latest(writer_conversation, "Writer")
-        await send_event("agent_message", {"agent": "Writer", "content": writer_text})
-
-        reviewer_prompt = (
-            "Review the draft for clarity, compliance, and brand safety. "
-            "Respond with JSON only: {\"approved\": true/false, \"feedback\": \"...\", \"risk_notes\": \"...\"}.\n\n"
-            f"Draft:\n{writer_text}"
-        )
-        reviewer_conversation = await run_sequential(
+    async def run_reviewer(writer_text: str, loop_index: int, label_suffix: str = ""):
+        reviewer_prompt = _REVIEWER_TMPL.substitute(draft=writer_text)
+        reviewer_last = await run_sequential(
             [agents.reviewer],
             reviewer_prompt,
             "reviewer",
-            f"Reviewer (loop {loop_index})",
+            f"Reviewer (loop {loop_index}{label_suffix})",
         )
-        reviewer_text = _extract_latest(reviewer_conversation, "Reviewer")
-        return writer_text, reviewer_text
+        return _latest(reviewer_last, "Reviewer")
+
+    async def run_writer_reviewer(
+        prompt: str, loop_index: int, label_suffix: str = "", announce_draft: bool = True
+    ):
+        if fused_review:
+            # One round-trip returns the draft plus a self-review verdict; the
+            # separate Azure reviewer only runs when the writer does not
+            # approve its own draft (or the fused JSON is unusable).
+            writer_last = await run_sequential(
+                [agents.writer],
+                prompt + FUSED_REVIEW_SUFFIX,
+                "writer",
+                f"Writer (loop {loop_index}{label_suffix}, fused)",
+            )
+            fused_text = _latest(writer_last, "Writer")
+            fused = _parse_fused_review(fused_text)
+            writer_text = fused["draft"] if fused else fused_text
+            if announce_draft:
+                await send_event("agent_message", {"agent": "Writer", "content": writer_text})
+            if fused and fused["self_review"].get("approved"):
+                return writer_text, json.dumps(fused["self_review"])
+            return writer_text, await run_reviewer(writer_text, loop_index, label_suffix)
+
+        writer_last = await run_sequential(
+            [agents.writer],
+            prompt,
+            "writer",
+            f"Writer (loop {loop_index}{label_suffix})",
+        )
+        writer_text = _latest(writer_last, "Writer")
+        if announce_draft:
+            await send_event("agent_message", {"agent": "Writer", "content": writer_text})
+        return writer_text, await run_reviewer(writer_text, loop_index, label_suffix)
 
     await send_event("status", {"phase": "planner", "message": "Planning campaign strategy."})
 
-    plan_prompt = (
-        "Create a marketing campaign plan with: objectives, key message, channel mix, "
-        "timeline, and KPIs. Use this context:\n"
-        f"Brief: {request.brief}\n"
-        f"Goal: {request.goal}\n"
-        f"Audience: {request.audience}\n"
-        f"Channels: {', '.join(request.channels)}\n"
-        f"Tone: {request.tone}\n"
-        f"Constraints: {request.brand_constraints}\n"
+    context_block = _CONTEXT_TMPL.substitute(
+        brief=request.brief,
+        goal=request.goal,
+        audience=request.audience,
+        channels=", ".join(request.channels),
+        tone=request.tone,
+        constraints=request.brand_constraints,
+    )
+    plan_prompt = _PLAN_TMPL.substitute(context=context_block)
+    # The skeleton draft only depends on the raw brief, not on the plan, so it
+    # can run speculatively while the planner works. The first writer loop then
+    # refines the skeleton against the finished plan instead of starting cold.
+    skeleton_prompt = _SKELETON_TMPL.substitute(context=context_block)
+    plan_task = asyncio.create_task(
+        run_sequential([agents.planner], plan_prompt, "planner", "Planner")
+    )
+    skeleton_task = asyncio.create_task(
+        run_sequential([agents.writer], skeleton_prompt, "writer", "Writer (skeleton draft)")
     )
-    plan_conversation = await run_sequential([agents.planner], plan_prompt, "planner", "Planner")
-    plan = _extract_latest(plan_conversation, "Planner")
+    plan_last, skeleton_last = await asyncio.gather(plan_task, skeleton_task)
+    plan = _latest(plan_last, "Planner")
+    skeleton_draft = _latest(skeleton_last, "Writer")
     await send_event("agent_message", {"agent": "Planner", "content": plan})
 
     draft = ""
     reviewer_feedback = ""
     approved = False
     force_reject_first = os.getenv("FORCE_REVIEWER_REJECT_FIRST", "").lower() in ("1", "true", "yes")
+    writer_variants = max(1, int(os.getenv("WRITER_VARIANTS", "2")))
+    fused_review = os.getenv("CAMPAIGN_FUSED_REVIEW", "").lower() in ("1", "true", "yes")
+
+    # Stable writer prefix computed once per workflow: instructions, plan, and
+    # brand constraints never change between loops, so only the tail below
+    # varies per call.
+    writer_prefix = _WRITER_PREFIX_TMPL.substitute(
+        plan=plan,
+        constraints=request.brand_constraints,
+    )
 
     for loop_index in range(1, request.loop_limit + 1):
-        writer_prompt = (
-            "Write a campaign draft based on this plan and feedback. Provide: "
-            "headline, key message, channel-specific copy, CTA, and disclaimers if needed.\n"
-            f"Plan:\n{plan}\n\n"
-        )
+        writer_prompt = writer_prefix
+        if loop_index == 1 and skeleton_draft:
+            writer_prompt += _SKELETON_TAIL_TMPL.substitute(skeleton=skeleton_draft)
         if reviewer_feedback:
-            writer_prompt += f"Reviewer feedback to address:\n{reviewer_feedback}\n"
+            writer_prompt += _FEEDBACK_TAIL_TMPL.substitute(feedback=reviewer_feedback)
 
-        draft, review_response = await run_writer_reviewer(writer_prompt, loop_index)
+        # Launch variant drafts speculatively and take the earliest approved
+        # reviewer result; if none is approved, keep the first to finish so
+        # its feedback drives the next loop.
+        variant_prompts = [writer_prompt]
+        for extra in range(1, writer_variants):
+            variant_prompts.append(
+                writer_prompt + _VARIANT_TAIL_TMPL.substitute(variant=extra + 1)
+            )
+        tasks = [
+            asyncio.create_task(
+                run_writer_reviewer(
+                    prompt,
+                    loop_index,
+                    label_suffix=f", variant {index + 1}" if len(variant_prompts) > 1 else "",
+                    # Only the chosen draft is announced, below, so losing
+                    # variants never show up as Writer messages in the UI.
+                    announce_draft=False,
+                )
+            )
+            for index, prompt in enumerate(variant_prompts)
+        ]
+        chosen = None
+        variant_errors = []
+        try:
+            for future in asyncio.as_completed(tasks):
+                try:
+                    variant_draft, variant_review = await future
+                except asyncio.CancelledError:
+                    raise
+                except Exception as exc:
+                    # A failed variant should not take down the survivors;
+                    # only give up when every variant has failed.
+                    variant_errors.append(exc)
+                    continue
+                if chosen is None:
+                    chosen = (variant_draft, variant_review)
+                variant_parsed = _parse_review(variant_review)
+                if variant_parsed and variant_parsed.get("approved"):
+                    chosen = (variant_draft, variant_review)
+                    break
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+        if chosen is None:
+            raise variant_errors[0]
+        draft, review_response = chosen
+        await send_event("agent_message", {"agent": "Writer", "content": draft})
 
-        parsed = _safe_json_parse(review_response)
+        parsed = _parse_review(review_response)
         if parsed:
             approved = bool(parsed.get("approved"))
             reviewer_feedback = parsed.get("feedback", "")
@@ -171,14 +403,9 @@ async def run_campaign_workflow(
         human_feedback = await controls.feedback_queue.get()
         await send_event("status", {"phase": "human", "message": "Human feedback received."})
 
-        writer_prompt = (
-            "Write a campaign draft based on this plan and feedback. Provide: "
-            "headline, key message, channel-specific copy, CTA, and disclaimers if needed.\n"
-            f"Plan:\n{plan}\n\n"
-            f"Human feedback to incorporate:\n{human_feedback}\n"
-        )
+        writer_prompt = writer_prefix + _HUMAN_TAIL_TMPL.substitute(feedback=human_feedback)
         if reviewer_feedback:
-            writer_prompt += f"Previous reviewer feedback:\n{reviewer_feedback}\n"
+            writer_prompt += _PREVIOUS_FEEDBACK_TAIL_TMPL.substitute(feedback=reviewer_feedback)
 
         draft, review_response = await run_writer_reviewer(writer_prompt, request.loop_limit + 1)
 
@@ -196,13 +423,9 @@ async def run_campaign_workflow(
         return {"published": False, "draft": draft}
 
     await send_event("status", {"phase": "publisher", "message": "Publisher preparing release."})
-    publish_prompt = (
-        "Finalize the approved campaign into a publish-ready package: final copy, "
-        "scheduling notes, and asset checklist.\n\n"
-        f"Approved Draft:\n{draft}"
-    )
-    publish_conversation = await run_sequential([agents.publisher], publish_prompt, "publisher", "Publisher")
-    publish_result = _extract_latest(publish_conversation, "Publisher")
+    publish_prompt = _PUBLISH_TMPL.substitute(draft=draft)
+    publisher_last = await run_sequential([agents.publisher], publish_prompt, "publisher", "Publisher")
+    publish_result = _latest(publisher_last, "Publisher")
     await send_event("agent_message", {"agent": "Publisher", "content": publish_result})
 
     await send_event(
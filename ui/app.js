@@ -33,6 +33,7 @@ function App() {
   const [connected, setConnected] = useState(false);
   const [events, setEvents] = useState([]);
   const [agentStatus, setAgentStatus] = useState({});
+  const [streamingText, setStreamingText] = useState({});
   const [reviewDecision, setReviewDecision] = useState(null);
   const [needsHuman, setNeedsHuman] = useState(null);
   const [needsApproval, setNeedsApproval] = useState(null);
@@ -79,6 +80,7 @@ function App() {
       if (payload.message && payload.message.toLowerCase().includes("cancelled")) {
         setIsRunning(false);
         setActiveTimers({});
+        setStreamingText({});
       }
       if (payload.message && payload.message.toLowerCase().includes("started")) {
         setActiveTimers((prev) => ({ ...prev, [payload.phase]: Date.now() }));
@@ -89,8 +91,20 @@ function App() {
           delete next[payload.phase];
           return next;
         });
+        // The full text lands as an agent_message; drop the partial stream.
+        setStreamingText((prev) => {
+          const next = { ...prev };
+          delete next[payload.phase];
+          return next;
+        });
       }
     }
+    if (type === "agent_stream") {
+      setStreamingText((prev) => ({
+        ...prev,
+        [payload.phase]: (prev[payload.phase] || "") + payload.delta,
+      }));
+    }
     if (type === "agent_message") {
       setEvents((prev) => [
         { id: nextEventId(), kind: "agent", agent: payload.agent, content: payload.content },
@@ -213,8 +227,10 @@ function App() {
 
     ws.onopen = () => setConnected(true);
     ws.onclose = () => setConnected(false);
-    ws.onmessage = (event) => {
-      const data = JSON.parse(event.data);
+    ws.onmessage = async (event) => {
+      // The backend sends binary frames (orjson-encoded); accept text too.
+      const raw = typeof event.data === "string" ? event.data : await event.data.text();
+      const data = JSON.parse(raw);
       handleEventRef.current(data);
     };
 
@@ -255,6 +271,7 @@ function App() {
     setReviewDecision(null);
     setAgentStatus({});
     setActiveTimers({});
+    setStreamingText({});
     setIsRunning(true);
     setApprovalState("Waiting");
     setSelectedPublished(null);
@@ -580,6 +597,17 @@ function App() {
                   <p>Start a workflow to see agents respond here.</p>
                 </div>
               )}
+              {Object.entries(streamingText).map(([phase, text]) => (
+                <div className="feed-item" key={`stream-${phase}`}>
+                  <div className="feed-avatar">{(phaseToAgent[phase] || phase)[0]}</div>
+                  <div>
+                    <h4>
+                      {phaseToAgent[phase] || phase} <span className="muted">streaming...</span>
+                    </h4>
+                    <p>{text}</p>
+                  </div>
+                </div>
+              ))}
               {latestEvents.map((event) => (
                 <div className="feed-item" key={event.id}>
                   <div className="feed-avatar">{(event.agent || event.title || "S")[0]}</div>